@@ -18,7 +18,8 @@ from test_prototype_transforms_functional import (
 )
 from torchvision.ops.boxes import box_iou
 from torchvision.prototype import features, transforms
-from torchvision.transforms.functional import InterpolationMode, pil_to_tensor, to_pil_image
+from torchvision.prototype.transforms._auto_augment import _AFFINE_PARAMETERS, _AffineAccumulator
+from torchvision.transforms.functional import _get_inverse_affine_matrix, InterpolationMode, pil_to_tensor, to_pil_image
 
 
 def make_vanilla_tensor_images(*args, **kwargs):
@@ -147,7 +148,7 @@ class TestSmoke:
                             features.ColorSpace.RGB,
                         ],
                         dtypes=[torch.uint8],
-                        extra_dims=[(4,)],
+                        extra_dims=[(4,), (2, 3)],
                     )
                     for fn in [
                         make_images,
@@ -1001,6 +1002,297 @@ class TestRandomErasing:
             assert output is inpt_sentinel
 
 
+class TestAutoAugment:
+    @pytest.mark.parametrize(
+        "transform_cls",
+        [transforms.AutoAugment, transforms.RandAugment, transforms.TrivialAugmentWide, transforms.AugMix],
+    )
+    def test_seed(self, transform_cls):
+        transform = transform_cls()
+        image = make_image(color_space=features.ColorSpace.RGB, dtype=torch.uint8)
+
+        # The default generator of torch is reseeded differently to make sure the output only depends on the seed
+        torch.manual_seed(1)
+        transform.seed(0)
+        expected = transform(image)
+        torch.manual_seed(2)
+        transform.seed(0)
+        actual = transform(image)
+
+        assert_equal(actual, expected)
+
+    @pytest.mark.parametrize(
+        "transform_cls",
+        [transforms.AutoAugment, transforms.RandAugment, transforms.TrivialAugmentWide, transforms.AugMix],
+    )
+    def test_torch_manual_seed(self, transform_cls):
+        transform = transform_cls()
+        image = make_image(color_space=features.ColorSpace.RGB, dtype=torch.uint8)
+
+        torch.manual_seed(0)
+        expected = [transform(image) for _ in range(5)]
+        torch.manual_seed(0)
+        actual = [transform(image) for _ in range(5)]
+
+        for a, e in zip(actual, expected):
+            assert_equal(a, e)
+
+    def test_reseed_keeps_generator(self):
+        transform = transforms.RandAugment()
+        image = make_image(color_space=features.ColorSpace.RGB, dtype=torch.uint8)
+        generator = transform._rng
+
+        torch.manual_seed(0)
+        transform(image)
+        expected = generator.random()
+        torch.manual_seed(0)
+        transform(image)
+
+        assert transform._rng is generator
+        assert generator.random() == expected
+
+    @pytest.mark.parametrize("policy", list(transforms.AutoAugmentPolicy))
+    def test_auto_augment_drops_zero_probability_ops(self, policy):
+        transform = transforms.AutoAugment(policy)
+
+        for sub_policy, transform_idcs, probabilities in zip(
+            transform._policies, transform._policy_transform_idcs, transform._policy_probabilities
+        ):
+            expected = [transform_id for transform_id, probability, _ in sub_policy if probability > 0.0]
+            assert [transform._transform_ids[idx] for idx in transform_idcs.tolist()] == expected
+            assert (probabilities > 0.0).all()
+
+    @pytest.mark.parametrize(
+        "transform_cls",
+        [transforms.AutoAugment, transforms.RandAugment, transforms.TrivialAugmentWide, transforms.AugMix],
+    )
+    def test_magnitude_table(self, transform_cls):
+        transform_ids = tuple(transform_cls._AUGMENTATION_SPACE.keys())
+        num_bins, height, width = 10, 24, 32
+
+        magnitudes, signed = transform_cls._get_magnitude_table(transform_ids, num_bins, height, width)
+
+        assert magnitudes.shape == (len(transform_ids), num_bins)
+        for transform_id, row, row_signed in zip(transform_ids, magnitudes, signed):
+            magnitudes_fn, expected_signed = transform_cls._AUGMENTATION_SPACE[transform_id]
+            expected = magnitudes_fn(num_bins, height, width)
+            if expected is None:
+                expected = torch.zeros(num_bins)
+            torch.testing.assert_close(torch.tensor(row.tolist(), dtype=torch.float64), expected.to(torch.float64))
+            assert row_signed == expected_signed
+
+    @pytest.mark.parametrize("image_type", [features.Image, torch.Tensor, PIL.Image.Image])
+    def test_apply_image_transforms_fuses_affine(self, image_type, mocker):
+        transform = transforms.RandAugment(fuse_affine=True)
+        image = make_image((16, 20), color_space=features.ColorSpace.RGB, dtype=torch.uint8)
+        if image_type is torch.Tensor:
+            image = image.as_subclass(torch.Tensor)
+        elif image_type is PIL.Image.Image:
+            image = to_pil_image(image)
+        chain = [("TranslateX", 3.0), ("Identity", 0.0), ("TranslateY", -5.0)]
+
+        expected = image
+        for transform_id, magnitude in chain:
+            expected = transform._apply_image_transform(
+                expected, transform_id, magnitude, interpolation=InterpolationMode.NEAREST, fill=0
+            )
+
+        spy = mocker.spy(transform, "_apply_image_transform")
+        actual = transform._apply_image_transforms(image, chain, interpolation=InterpolationMode.NEAREST, fill=0)
+
+        spy.assert_not_called()
+        assert isinstance(actual, image_type)
+        assert_equal(
+            pil_to_tensor(actual) if image_type is PIL.Image.Image else actual,
+            pil_to_tensor(expected) if image_type is PIL.Image.Image else expected,
+        )
+
+    @pytest.mark.parametrize(
+        "transform_cls",
+        [transforms.AutoAugment, transforms.RandAugment, transforms.TrivialAugmentWide, transforms.AugMix],
+    )
+    def test_apply_image_transforms_sequential_by_default(self, transform_cls):
+        transform = transform_cls(interpolation=InterpolationMode.NEAREST)
+        image = make_image((16, 20), color_space=features.ColorSpace.RGB, dtype=torch.uint8)
+        # The second translation moves the content back into the frame, but the first one already replaced it by fill
+        chain = [("TranslateY", 5.0), ("TranslateY", -5.0)]
+
+        actual = transform._apply_image_transforms(image, chain, interpolation=InterpolationMode.NEAREST, fill=0)
+
+        assert_equal(actual[..., -5:, :], torch.zeros_like(image[..., -5:, :]))
+        assert_equal(actual[..., :-5, :], image[..., :-5, :])
+
+    @pytest.mark.parametrize(
+        "chain",
+        [
+            [("ShearX", 0.1), ("Rotate", 10.0)],
+            [("Rotate", 10.0), ("TranslateX", 3.0)],
+            [("TranslateY", 4.0), ("ShearY", -0.2), ("Rotate", -20.0)],
+        ],
+    )
+    def test_affine_accumulator_matrix(self, chain):
+        accumulator = _AffineAccumulator()
+        forward = torch.eye(3, dtype=torch.float64)
+        for transform_id, magnitude in chain:
+            accumulator.add(transform_id, magnitude)
+
+            angle, translate, shear = _AFFINE_PARAMETERS[transform_id](magnitude)
+            inverse = torch.tensor(
+                _get_inverse_affine_matrix([0.0, 0.0], angle, translate, 1.0, shear) + [0.0, 0.0, 1.0],
+                dtype=torch.float64,
+            ).reshape(3, 3)
+            # The transforms are applied one after the other, so the forward transform of each one is left-multiplied
+            forward = torch.linalg.inv(inverse) @ forward
+
+        expected = torch.linalg.inv(forward)[:2].flatten()
+        torch.testing.assert_close(torch.tensor(accumulator.matrix, dtype=torch.float64), expected)
+
+    @pytest.mark.parametrize(
+        "chain",
+        [
+            [("ShearX", 0.1), ("Rotate", 10.0)],
+            [("Rotate", 10.0), ("TranslateX", 3.0)],
+        ],
+    )
+    @pytest.mark.parametrize("image_type", [torch.Tensor, PIL.Image.Image])
+    def test_apply_image_transforms_fuses_non_commuting_affine(self, chain, image_type):
+        transform = transforms.RandAugment(fuse_affine=True)
+        # Bilinear interpolation of a linear ramp is exact, so resampling once or multiple times only differs close to
+        # the borders, where the fill is blended in.
+        y, x = torch.meshgrid(torch.arange(32.0), torch.arange(32.0), indexing="ij")
+        image = (x + 2 * y).unsqueeze(0).repeat(3, 1, 1)
+        valid = torch.ones_like(image)
+        if image_type is PIL.Image.Image:
+            image = to_pil_image(image.to(torch.uint8))
+            valid = to_pil_image(valid.mul(255).to(torch.uint8))
+
+        def apply_sequentially(inpt):
+            for transform_id, magnitude in chain:
+                inpt = transform._apply_image_transform(
+                    inpt, transform_id, magnitude, interpolation=InterpolationMode.BILINEAR, fill=0
+                )
+            return pil_to_tensor(inpt).float() if image_type is PIL.Image.Image else inpt
+
+        expected = apply_sequentially(image)
+        valid = apply_sequentially(valid)
+        # Erode the area that was never touched by the fill to stay clear of the border handling of the kernels
+        mask = valid.amin(dim=0, keepdim=True) == valid.max()
+        mask = -torch.nn.functional.max_pool2d(-mask.float().unsqueeze(0), 5, stride=1, padding=2).squeeze(0) == 1
+        assert mask.sum() > 256
+
+        actual = transform._apply_image_transforms(image, chain, interpolation=InterpolationMode.BILINEAR, fill=0)
+        if image_type is PIL.Image.Image:
+            actual = pil_to_tensor(actual).float()
+
+        mask = mask.expand_as(actual)
+        torch.testing.assert_close(
+            actual[mask], expected[mask], rtol=0, atol=2 if image_type is PIL.Image.Image else 1e-3
+        )
+
+    @pytest.mark.parametrize("dtype", [torch.uint8, torch.float32])
+    def test_apply_image_transforms_photometric_matches_sequential(self, dtype):
+        transform = transforms.RandAugment()
+        # Brightness first pushes the red channel beyond the value range, so the result depends on the clamping in
+        # between the ops
+        image = features.Image(torch.tensor([200, 100, 50], dtype=torch.uint8).view(3, 1, 1).repeat(1, 4, 4))
+        if dtype == torch.float32:
+            image = features.Image(image / 255)
+        chain = [("Brightness", 0.3), ("Color", 0.5), ("Contrast", -0.2)]
+
+        expected = image
+        for transform_id, magnitude in chain:
+            expected = transform._apply_image_transform(
+                expected, transform_id, magnitude, interpolation=InterpolationMode.NEAREST, fill=0
+            )
+
+        actual = transform._apply_image_transforms(image, chain, interpolation=InterpolationMode.NEAREST, fill=0)
+
+        assert_equal(actual, expected)
+
+    @pytest.mark.parametrize("interpolation", [InterpolationMode.NEAREST, InterpolationMode.BILINEAR])
+    @pytest.mark.parametrize("fill", [0, 127])
+    @pytest.mark.parametrize("image_type", [features.Image, torch.Tensor, PIL.Image.Image])
+    def test_rotate(self, interpolation, fill, image_type):
+        transform = transforms.RandAugment()
+        image = make_image((16, 20), color_space=features.ColorSpace.RGB, dtype=torch.uint8)
+        if image_type is torch.Tensor:
+            image = image.as_subclass(torch.Tensor)
+        elif image_type is PIL.Image.Image:
+            image = to_pil_image(image)
+
+        actual = transform._apply_image_transform(image, "Rotate", 15.0, interpolation=interpolation, fill=fill)
+        expected = transforms.functional.rotate(image, angle=15.0, interpolation=interpolation, fill=fill)
+
+        assert isinstance(actual, image_type)
+        assert_equal(
+            pil_to_tensor(actual) if image_type is PIL.Image.Image else actual,
+            pil_to_tensor(expected) if image_type is PIL.Image.Image else expected,
+        )
+
+    @pytest.mark.parametrize("device", cpu_and_gpu())
+    @pytest.mark.parametrize("extra_dims", [(), (2,)])
+    @pytest.mark.parametrize("dtype", [torch.uint8, torch.float32])
+    def test_augmix_mixing(self, extra_dims, dtype, device, mocker):
+        transform = transforms.AugMix(mixture_width=3, interpolation=InterpolationMode.NEAREST, fuse_affine=True)
+        image = make_image((16, 20), color_space=features.ColorSpace.RGB, extra_dims=extra_dims, dtype=dtype).to(device)
+        chains = [
+            [("Posterize", 4.0)] if dtype == torch.uint8 else [("Invert", 0.0)],
+            # Adjacent geometric ops are fused into a single resample
+            [("ShearX", 0.2), ("Rotate", 10.0), ("Solarize", 0.5 if dtype.is_floating_point else 128.0)],
+            [("Brightness", 0.3)],
+        ]
+
+        def sample_dirichlet(params):
+            weights = torch.arange(1, params.shape[-1] + 1, dtype=params.dtype, device=params.device)
+            return (weights / weights.sum()).expand_as(params).clone()
+
+        mocker.patch.object(transform, "_sample_dirichlet", side_effect=sample_dirichlet)
+        mocker.patch.object(transform, "_sample_chains", return_value=chains)
+
+        actual = transform(image)
+
+        batch = image.data.view([1] * max(4 - image.ndim, 0) + list(image.shape))
+        batch_dims = [batch.size(0)] + [1] * (batch.ndim - 1)
+        m = sample_dirichlet(torch.ones(batch_dims[0], 2, device=device))
+        combined_weights = sample_dirichlet(torch.ones(batch_dims[0], 3, device=device)) * m[:, 1].view(
+            [batch_dims[0], -1]
+        )
+        mix = m[:, 0].view(batch_dims) * batch
+        for i, chain in enumerate(chains):
+            aug = transform._apply_image_transforms(
+                batch, chain, interpolation=InterpolationMode.NEAREST, fill=transform.fill
+            )
+            mix.add_(combined_weights[:, i].view(batch_dims) * aug)
+        expected = mix.view(image.shape).to(dtype)
+
+        assert isinstance(actual, features.Image)
+        torch.testing.assert_close(actual, expected, rtol=0, atol=1 if dtype == torch.uint8 else 1e-6)
+
+    def test_augmix_dirichlet_params_follow_attributes(self):
+        transform = transforms.AugMix(mixture_width=2, alpha=1.0)
+        image = make_image(color_space=features.ColorSpace.RGB, dtype=torch.uint8)
+        transform(image)
+
+        transform.mixture_width = 4
+        transform.alpha = 0.5
+        transform(image)
+
+        beta_params, mix_params = transform._get_dirichlet_params(torch.device("cpu"))
+        assert_equal(beta_params, torch.full((1, 2), 0.5))
+        assert_equal(mix_params, torch.full((1, 4), 0.5))
+
+    def test_augmix_pil_image_warning(self):
+        transform = transforms.AugMix()
+        image = to_pil_image(make_image(color_space=features.ColorSpace.RGB, dtype=torch.uint8))
+
+        with pytest.warns(UserWarning, match="converts PIL images to tensors") as record:
+            output = transform(image)
+
+        assert isinstance(output, PIL.Image.Image)
+        # The warning has to point at the call site, so that users can find and filter it
+        assert record[0].filename == __file__
+
+
 class TestTransform:
     @pytest.mark.parametrize(
         "inpt_type",
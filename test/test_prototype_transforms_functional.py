@@ -14,6 +14,7 @@ from torch.nn.functional import one_hot
 from torchvision.prototype import features
 from torchvision.prototype.transforms.functional._geometry import _center_crop_compute_padding
 from torchvision.prototype.transforms.functional._meta import convert_bounding_box_format
+from torchvision.transforms import functional_tensor as _FT
 from torchvision.transforms.functional import _get_perspective_coeffs
 from torchvision.transforms.functional_tensor import _max_value as get_max_value
 
@@ -1842,6 +1843,54 @@ def test_correctness_elastic_image_or_mask_tensor(device, fn, make_samples):
         torch.testing.assert_close(output[..., 37, 23], sample[..., in_box[3] - 1, in_box[2] - 1])
 
 
+@pytest.mark.parametrize(
+    "image",
+    [
+        *[
+            make_image((16, 20), color_space=color_space, extra_dims=extra_dims, dtype=torch.uint8)
+            for color_space in [features.ColorSpace.GRAY, features.ColorSpace.RGB]
+            for extra_dims in [(), (4,)]
+        ],
+        features.Image(torch.full((3, 8, 8), 17, dtype=torch.uint8)),
+    ],
+)
+def test_correctness_equalize_image_tensor(image):
+    torch.testing.assert_close(F.equalize_image_tensor(image), _FT.equalize(image), rtol=0, atol=0)
+
+
+@pytest.mark.parametrize(
+    ("fn", "reference_fn", "kwarg"),
+    [
+        (F.adjust_brightness_image_tensor, _FT.adjust_brightness, "brightness_factor"),
+        (F.adjust_saturation_image_tensor, _FT.adjust_saturation, "saturation_factor"),
+        (F.adjust_contrast_image_tensor, _FT.adjust_contrast, "contrast_factor"),
+    ],
+)
+@pytest.mark.parametrize("factor", [0.0, 0.1, 1.0, 1.9])
+@pytest.mark.parametrize("color_space", [features.ColorSpace.GRAY, features.ColorSpace.RGB])
+@pytest.mark.parametrize("dtype", [torch.uint8, torch.float32])
+def test_correctness_adjust_image_tensor(fn, reference_fn, kwarg, factor, color_space, dtype):
+    image = make_image((16, 20), color_space=color_space, extra_dims=(4,), dtype=dtype)
+
+    torch.testing.assert_close(fn(image, **{kwarg: factor}), reference_fn(image, **{kwarg: factor}), rtol=0, atol=0)
+
+
+@pytest.mark.parametrize(
+    "image",
+    [
+        *[
+            make_image((16, 20), color_space=color_space, extra_dims=extra_dims, dtype=dtype)
+            for color_space in [features.ColorSpace.GRAY, features.ColorSpace.RGB]
+            for extra_dims in [(), (4,)]
+            for dtype in [torch.uint8, torch.float32]
+        ],
+        features.Image(torch.full((3, 8, 8), 17, dtype=torch.uint8)),
+    ],
+)
+def test_correctness_autocontrast_image_tensor(image):
+    torch.testing.assert_close(F.autocontrast_image_tensor(image), _FT.autocontrast(image), rtol=0, atol=0)
+
+
 def test_midlevel_normalize_output_type():
     inpt = torch.rand(1, 3, 32, 32)
     output = F.normalize(inpt, mean=(0.5, 0.5, 0.5), std=(1.0, 1.0, 1.0))
@@ -1,27 +1,181 @@
+import functools
 import math
 import numbers
-from typing import Any, Callable, cast, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+import sys
+import warnings
+from typing import Any, Callable, cast, Dict, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import PIL.Image
 import torch
 
 from torchvision.prototype import features
 from torchvision.prototype.transforms import functional as F, Transform
+from torchvision.transforms import functional_pil as _FP, functional_tensor as _FT
 from torchvision.transforms.autoaugment import AutoAugmentPolicy
-from torchvision.transforms.functional import InterpolationMode, pil_to_tensor, to_pil_image
-
-from ._utils import is_simple_tensor, query_chw
-
-K = TypeVar("K")
-V = TypeVar("V")
+from torchvision.transforms.functional import (
+    _get_inverse_affine_matrix,
+    InterpolationMode,
+    pil_modes_mapping,
+    pil_to_tensor,
+    to_pil_image,
+)
+
+from .functional._geometry import _convert_fill_arg
+from ._utils import get_chw, is_simple_tensor, query_chw
+
+# Maps the geometric transform ids to the (angle, translate, shear) parameters of the equivalent affine transformation.
+_AFFINE_PARAMETERS: Dict[str, Callable[[float], Tuple[float, List[float], List[float]]]] = {
+    "ShearX": lambda magnitude: (0.0, [0.0, 0.0], [math.degrees(magnitude), 0.0]),
+    "ShearY": lambda magnitude: (0.0, [0.0, 0.0], [0.0, math.degrees(magnitude)]),
+    "TranslateX": lambda magnitude: (0.0, [float(int(magnitude)), 0.0], [0.0, 0.0]),
+    "TranslateY": lambda magnitude: (0.0, [0.0, float(int(magnitude))], [0.0, 0.0]),
+    # F.rotate rotates counter-clockwise, whereas F.affine rotates clockwise
+    "Rotate": lambda magnitude: (-magnitude, [0.0, 0.0], [0.0, 0.0]),
+}
+
+# Multiplier of the 128 bit linear congruential generator underlying numpy's default PCG64 bit generator.
+_PCG64_MULTIPLIER = 0x2360ED051FC65DA44385DF649FCCF645
+_PCG64_MASK = (1 << 128) - 1
+
+
+def _get_caller_stacklevel() -> int:
+    # Returns the stacklevel that points a warning issued by the calling function at the first frame outside of torch
+    # and torchvision, i.e. the user code, regardless of how many nn.Module or Compose frames are in between.
+    stacklevel = 1
+    frame = sys._getframe(1)
+    while frame.f_back is not None and frame.f_globals.get("__name__", "").split(".")[0] in {"torch", "torchvision"}:
+        frame = frame.f_back
+        stacklevel += 1
+    return stacklevel
+
+
+class _AffineAccumulator:
+    """Composes consecutive geometric transforms, so the image only needs to be resampled once.
+
+    Since there is no intermediate image anymore, content that one transform moves out of the frame is no longer lost
+    if a later transform moves it back in. For example, translating by 10 pixels and then by -10 pixels returns the
+    original image, whereas applying both transforms one after the other leaves a 10 pixel wide stripe of fill.
+    """
+
+    def __init__(self) -> None:
+        self.transforms: List[Tuple[str, float]] = []
+        # Inverse affine matrix with the image center as origin, i.e. the same convention as _FT.affine uses.
+        self.matrix = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0]
+
+    def add(self, transform_id: str, magnitude: float) -> None:
+        angle, translate, shear = _AFFINE_PARAMETERS[transform_id](magnitude)
+        a2, b2, c2, d2, e2, f2 = _get_inverse_affine_matrix([0.0, 0.0], angle, translate, 1.0, shear)
+        a1, b1, c1, d1, e1, f1 = self.matrix
+        # The output is sampled at the inverse mapping. Thus, the inverse of the composed transformation is the
+        # product of the individual inverses in the order the transforms are applied.
+        self.matrix = [
+            a1 * a2 + b1 * d2,
+            a1 * b2 + b1 * e2,
+            a1 * c2 + b1 * f2 + c1,
+            d1 * a2 + e1 * d2,
+            d1 * b2 + e1 * e2,
+            d1 * c2 + e1 * f2 + f1,
+        ]
+        self.transforms.append((transform_id, magnitude))
 
 
 class _AutoAugmentBase(Transform):
+    """Base class of the automatic augmentation transforms.
+
+    The ops are applied on the device of the input and sampling the augmentations happens purely on the CPU, so the
+    transforms never create CUDA tensors on their own and are safe to use in forked or spawned
+    :class:`~torch.utils.data.DataLoader` workers. Since a single image passes through several full-size ops, they
+    should run in the workers, i.e. with ``num_workers > 0``, rather than in the training loop. To overlap the host to
+    device copies with the GPU compute, set ``pin_memory=True`` on the data loader and move the batches with
+    ``.to(device, non_blocking=True)``. The transforms themselves deliberately do not allocate pinned memory: the
+    batches coming from the workers are collated and pinned in the main process, so pinning individual images inside a
+    worker would only add an extra copy.
+
+    With ``fuse_affine=True``, consecutive geometric ops, i.e. ShearX, ShearY, TranslateX, TranslateY, and Rotate, are
+    composed into a single affine transformation, so the image is only resampled once. This is faster and blurs the
+    image less, but changes the augmentations: content that one op moves out of the frame is no longer replaced by the
+    fill if a later op moves it back in. For example, the CIFAR10 sub-policy translating twice along the y-axis returns
+    the untouched image if the two translations cancel out. Thus, the ops are applied one after the other by default.
+    """
+
+    _AUGMENTATION_SPACE: Dict[str, Tuple[Callable[[int, int, int], Optional[torch.Tensor]], bool]]
+
+    # Maps the transform ids to callables with the signature (image, magnitude, interpolation, fill). The functional
+    # ops are bound as default arguments, so dispatching an op is a single dictionary lookup and call.
+    _OP_TABLE: Dict[str, Callable[..., Any]] = {
+        "Identity": lambda image, magnitude, interpolation, fill: image,
+        "ShearX": lambda image, magnitude, interpolation, fill, affine=F.affine, degrees=math.degrees: affine(
+            image,
+            angle=0.0,
+            translate=[0, 0],
+            scale=1.0,
+            shear=[degrees(magnitude), 0.0],
+            interpolation=interpolation,
+            fill=fill,
+        ),
+        "ShearY": lambda image, magnitude, interpolation, fill, affine=F.affine, degrees=math.degrees: affine(
+            image,
+            angle=0.0,
+            translate=[0, 0],
+            scale=1.0,
+            shear=[0.0, degrees(magnitude)],
+            interpolation=interpolation,
+            fill=fill,
+        ),
+        "TranslateX": lambda image, magnitude, interpolation, fill, affine=F.affine: affine(
+            image,
+            angle=0.0,
+            translate=[int(magnitude), 0],
+            scale=1.0,
+            shear=[0.0, 0.0],
+            interpolation=interpolation,
+            fill=fill,
+        ),
+        "TranslateY": lambda image, magnitude, interpolation, fill, affine=F.affine: affine(
+            image,
+            angle=0.0,
+            translate=[0, int(magnitude)],
+            scale=1.0,
+            shear=[0.0, 0.0],
+            interpolation=interpolation,
+            fill=fill,
+        ),
+        # F.rotate rotates counter-clockwise, whereas F.affine rotates clockwise
+        "Rotate": lambda image, magnitude, interpolation, fill, affine=F.affine: affine(
+            image,
+            angle=-magnitude,
+            translate=[0, 0],
+            scale=1.0,
+            shear=[0.0, 0.0],
+            interpolation=interpolation,
+            fill=fill,
+        ),
+        "Brightness": lambda image, magnitude, interpolation, fill, op=F.adjust_brightness: op(
+            image, brightness_factor=1.0 + magnitude
+        ),
+        "Color": lambda image, magnitude, interpolation, fill, op=F.adjust_saturation: op(
+            image, saturation_factor=1.0 + magnitude
+        ),
+        "Contrast": lambda image, magnitude, interpolation, fill, op=F.adjust_contrast: op(
+            image, contrast_factor=1.0 + magnitude
+        ),
+        "Sharpness": lambda image, magnitude, interpolation, fill, op=F.adjust_sharpness: op(
+            image, sharpness_factor=1.0 + magnitude
+        ),
+        "Posterize": lambda image, magnitude, interpolation, fill, op=F.posterize: op(image, bits=int(magnitude)),
+        "Solarize": lambda image, magnitude, interpolation, fill, op=F.solarize: op(image, threshold=magnitude),
+        "AutoContrast": lambda image, magnitude, interpolation, fill, op=F.autocontrast: op(image),
+        "Equalize": lambda image, magnitude, interpolation, fill, op=F.equalize: op(image),
+        "Invert": lambda image, magnitude, interpolation, fill, op=F.invert: op(image),
+    }
+
     def __init__(
         self,
         *,
         interpolation: InterpolationMode = InterpolationMode.NEAREST,
         fill: Union[int, float, Sequence[int], Sequence[float]] = 0,
+        fuse_affine: bool = False,
     ) -> None:
         super().__init__()
         self.interpolation = interpolation
@@ -29,13 +183,100 @@ class _AutoAugmentBase(Transform):
         if not isinstance(fill, (numbers.Number, tuple, list)):
             raise TypeError("Got inappropriate fill arg")
         self.fill = fill
-
-    def _get_random_item(self, dct: Dict[K, V]) -> Tuple[K, V]:
-        keys = tuple(dct.keys())
-        key = keys[int(torch.randint(len(keys), ()))]
-        return key, dct[key]
+        self.fuse_affine = fuse_affine
+
+        self._generator: Optional[np.random.Generator] = None
+        self._seeded = False
+
+        # The ops are sampled by index, so we keep the ids around rather than walking the dictionary on every call.
+        self._transform_ids = tuple(self._AUGMENTATION_SPACE.keys())
+
+    def _reseed(self) -> None:
+        # Drawing a scalar from numpy is a lot cheaper than creating a tensor for it. To keep torch's default
+        # generator in charge, e.g. torch.manual_seed() or the per worker seeding of the DataLoader, the numpy
+        # generator is seeded from a single torch draw for every call, unless a fixed seed was set with seed().
+        if self._seeded:
+            return
+
+        # Creating a new generator hashes the seed through a SeedSequence, which costs more than the scalar draws it
+        # replaces. Thus, we only reset the state of the existing one the same way PCG64 initializes it from a seed.
+        seed = int(torch.randint(2**63 - 1, ()))
+        inc = (seed << 1) | 1
+        self._rng.bit_generator.state = {
+            "bit_generator": "PCG64",
+            "state": {"state": ((inc + seed) * _PCG64_MULTIPLIER + inc) & _PCG64_MASK, "inc": inc},
+            "has_uint32": 0,
+            "uinteger": 0,
+        }
+
+    @property
+    def _rng(self) -> np.random.Generator:
+        if self._generator is None:
+            self._generator = np.random.default_rng(int(torch.randint(2**63 - 1, ())))
+        return self._generator
+
+    def seed(self, seed: int) -> None:
+        """Seeds the random number generator used to sample the augmentations.
+
+        Afterwards, the augmentations no longer depend on torch's default generator. Thus, the seed should be set per
+        worker process when used in a :class:`~torch.utils.data.DataLoader`, e.g. in its ``worker_init_fn``.
+        Otherwise, all workers sample the same augmentations.
+        """
+        self._generator = np.random.default_rng(seed)
+        self._seeded = True
+
+    @classmethod
+    @functools.lru_cache(maxsize=64)
+    def _get_magnitude_table(
+        cls, transform_ids: Tuple[str, ...], num_bins: int, height: int, width: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # The magnitudes only depend on the arguments. Since a training run usually only sees a single image size, we
+        # resolve them once into a (len(transform_ids), num_bins) table and afterwards only index into it. Ops without
+        # a magnitude get a row of zeros.
+        magnitudes = np.zeros((len(transform_ids), num_bins), dtype=np.float64)
+        signed = np.zeros(len(transform_ids), dtype=bool)
+        for idx, transform_id in enumerate(transform_ids):
+            magnitudes_fn, signed[idx] = cls._AUGMENTATION_SPACE[transform_id]
+            row = magnitudes_fn(num_bins, height, width)
+            if row is not None:
+                magnitudes[idx] = row.tolist()
+        magnitudes.setflags(write=False)
+        signed.setflags(write=False)
+        return magnitudes, signed
+
+    def _plan_transforms(
+        self,
+        transform_ids: Tuple[str, ...],
+        transform_idcs: np.ndarray,
+        magnitude_idcs: np.ndarray,
+        signs: np.ndarray,
+        num_bins: int,
+        height: int,
+        width: int,
+    ) -> List[Tuple[str, float]]:
+        # Turns the randomly drawn ops, magnitude bins and signs into the (transform_id, magnitude) chain that is
+        # passed to _apply_image_transforms. All random values are drawn upfront in bulk, so this is plain bookkeeping.
+        # The signs are uniform samples from [-0.5, 0.5) and only their sign bit is transferred to signed magnitudes.
+        magnitudes, signed = self._get_magnitude_table(transform_ids, num_bins, height, width)
+        magnitudes = magnitudes[transform_idcs, magnitude_idcs]
+        magnitudes = np.where(signed[transform_idcs], np.copysign(magnitudes, signs), magnitudes)
+        return [(transform_ids[idx], magnitude) for idx, magnitude in zip(transform_idcs.tolist(), magnitudes.tolist())]
+
+    def _sample_transforms(
+        self, transform_ids: Tuple[str, ...], num_ops: int, num_bins: int, height: int, width: int
+    ) -> List[Tuple[str, float]]:
+        return self._plan_transforms(
+            transform_ids,
+            self._rng.integers(len(transform_ids), size=num_ops),
+            self._rng.integers(num_bins, size=num_ops),
+            self._rng.random(num_ops) - 0.5,
+            num_bins,
+            height,
+            width,
+        )
 
     def _get_params(self, sample: Any) -> Dict[str, Any]:
+        self._reseed()
         _, height, width = query_chw(sample)
         return dict(height=height, width=width)
 
@@ -47,71 +288,85 @@ class _AutoAugmentBase(Transform):
         interpolation: InterpolationMode,
         fill: Union[int, float, Sequence[int], Sequence[float]],
     ) -> Any:
-        if transform_id == "Identity":
-            return image
-        elif transform_id == "ShearX":
-            return F.affine(
-                image,
-                angle=0.0,
-                translate=[0, 0],
-                scale=1.0,
-                shear=[math.degrees(magnitude), 0.0],
-                interpolation=interpolation,
-                fill=fill,
-            )
-        elif transform_id == "ShearY":
-            return F.affine(
-                image,
-                angle=0.0,
-                translate=[0, 0],
-                scale=1.0,
-                shear=[0.0, math.degrees(magnitude)],
-                interpolation=interpolation,
-                fill=fill,
-            )
-        elif transform_id == "TranslateX":
-            return F.affine(
-                image,
-                angle=0.0,
-                translate=[int(magnitude), 0],
-                scale=1.0,
-                shear=[0.0, 0.0],
-                interpolation=interpolation,
-                fill=fill,
-            )
-        elif transform_id == "TranslateY":
-            return F.affine(
-                image,
-                angle=0.0,
-                translate=[0, int(magnitude)],
-                scale=1.0,
-                shear=[0.0, 0.0],
-                interpolation=interpolation,
-                fill=fill,
-            )
-        elif transform_id == "Rotate":
-            return F.rotate(image, angle=magnitude)
-        elif transform_id == "Brightness":
-            return F.adjust_brightness(image, brightness_factor=1.0 + magnitude)
-        elif transform_id == "Color":
-            return F.adjust_saturation(image, saturation_factor=1.0 + magnitude)
-        elif transform_id == "Contrast":
-            return F.adjust_contrast(image, contrast_factor=1.0 + magnitude)
-        elif transform_id == "Sharpness":
-            return F.adjust_sharpness(image, sharpness_factor=1.0 + magnitude)
-        elif transform_id == "Posterize":
-            return F.posterize(image, bits=int(magnitude))
-        elif transform_id == "Solarize":
-            return F.solarize(image, threshold=magnitude)
-        elif transform_id == "AutoContrast":
-            return F.autocontrast(image)
-        elif transform_id == "Equalize":
-            return F.equalize(image)
-        elif transform_id == "Invert":
-            return F.invert(image)
-        else:
+        transform = self._OP_TABLE.get(transform_id)
+        if transform is None:
             raise ValueError(f"No transform available for {transform_id}")
 
+        if isinstance(image, torch.Tensor) and image.ndim > 4:
+            # Fold all batch dimensions into a single one, so every op runs exactly once over the whole batch. This
+            # also lets ops that only support a single batch dimension, e.g. equalize, handle arbitrary batches.
+            output = transform(image.reshape((-1,) + image.shape[-3:]), magnitude, interpolation, fill)
+            output = output.reshape(image.shape)
+            if isinstance(image, features.Image):
+                output = features.Image.new_like(image, output)
+            return output
+
+        return transform(image, magnitude, interpolation, fill)
+
+    def _apply_affine_transforms(
+        self,
+        image: Any,
+        accumulator: _AffineAccumulator,
+        interpolation: InterpolationMode,
+        fill: Union[int, float, Sequence[int], Sequence[float]],
+    ) -> Any:
+        if not accumulator.transforms:
+            return image
+        elif len(accumulator.transforms) == 1:
+            transform_id, magnitude = accumulator.transforms[0]
+            return self._apply_image_transform(image, transform_id, magnitude, interpolation=interpolation, fill=fill)
+
+        matrix = accumulator.matrix
+        if isinstance(image, PIL.Image.Image):
+            # The PIL kernel expects the origin of the matrix in the top left corner rather than in the image center.
+            _, height, width = get_chw(image)
+            cx, cy = width * 0.5, height * 0.5
+            a, b, c, d, e, f = matrix
+            matrix = [a, b, c + cx - a * cx - b * cy, d, e, f + cy - d * cx - e * cy]
+            return _FP.affine(image, matrix, interpolation=pil_modes_mapping[interpolation], fill=fill)
+
+        shape = image.shape
+        output = _FT.affine(
+            image.reshape((-1,) + shape[-3:]),
+            matrix,
+            interpolation=interpolation.value,
+            fill=_convert_fill_arg(fill),
+        ).reshape(shape)
+        if isinstance(image, features.Image):
+            output = features.Image.new_like(image, output)
+        return output
+
+    def _apply_image_transforms(
+        self,
+        image: Any,
+        transforms: Sequence[Tuple[str, float]],
+        interpolation: InterpolationMode,
+        fill: Union[int, float, Sequence[int], Sequence[float]],
+    ) -> Any:
+        if not self.fuse_affine:
+            for transform_id, magnitude in transforms:
+                image = self._apply_image_transform(
+                    image, transform_id, magnitude, interpolation=interpolation, fill=fill
+                )
+            return image
+
+        # Consecutive geometric transforms are composed into a single affine transformation and only applied once the
+        # chain hits a non-geometric transform or ends. This avoids resampling, and thus blurring, the image repeatedly.
+        accumulator = _AffineAccumulator()
+        for transform_id, magnitude in transforms:
+            if transform_id == "Identity":
+                continue
+            elif transform_id in _AFFINE_PARAMETERS:
+                accumulator.add(transform_id, magnitude)
+                continue
+
+            image = self._apply_affine_transforms(image, accumulator, interpolation=interpolation, fill=fill)
+            accumulator = _AffineAccumulator()
+
+            image = self._apply_image_transform(image, transform_id, magnitude, interpolation=interpolation, fill=fill)
+
+        return self._apply_affine_transforms(image, accumulator, interpolation=interpolation, fill=fill)
+
 
 class AutoAugment(_AutoAugmentBase):
     _AUGMENTATION_SPACE = {
@@ -147,11 +402,27 @@ class AutoAugment(_AutoAugmentBase):
         policy: AutoAugmentPolicy = AutoAugmentPolicy.IMAGENET,
         interpolation: InterpolationMode = InterpolationMode.NEAREST,
         fill: Union[int, float, Sequence[int], Sequence[float]] = 0,
+        fuse_affine: bool = False,
     ) -> None:
-        super().__init__(interpolation=interpolation, fill=fill)
+        super().__init__(interpolation=interpolation, fill=fill, fuse_affine=fuse_affine)
         self.policy = policy
         self._policies = self._get_policies(policy)
 
+        # Each policy is stored as parallel arrays, so a single vectorized comparison decides which of its ops are
+        # applied. Ops with a probability of zero can never be applied and are thus dropped upfront.
+        self._policy_transform_idcs: List[np.ndarray] = []
+        self._policy_probabilities: List[np.ndarray] = []
+        self._policy_magnitude_idcs: List[np.ndarray] = []
+        for sub_policy in self._policies:
+            ops = [op for op in sub_policy if op[1] > 0.0]
+            self._policy_transform_idcs.append(
+                np.array([self._transform_ids.index(transform_id) for transform_id, _, _ in ops], dtype=np.int8)
+            )
+            self._policy_probabilities.append(np.array([probability for _, probability, _ in ops], dtype=np.float32))
+            self._policy_magnitude_idcs.append(
+                np.array([-1 if magnitude_idx is None else magnitude_idx for _, _, magnitude_idx in ops], dtype=np.int8)
+            )
+
     def _get_policies(
         self, policy: AutoAugmentPolicy
     ) -> List[Tuple[Tuple[str, float, Optional[int]], Tuple[str, float, Optional[int]]]]:
@@ -244,32 +515,30 @@ class AutoAugment(_AutoAugmentBase):
 
     def _get_params(self, sample: Any) -> Dict[str, Any]:
         params = super(AutoAugment, self)._get_params(sample)
-        params["policy"] = self._policies[int(torch.randint(len(self._policies), ()))]
+        params["policy_idx"] = int(self._rng.integers(len(self._policies)))
         return params
 
     def _transform(self, inpt: Any, params: Dict[str, Any]) -> Any:
         if not (isinstance(inpt, (features.Image, PIL.Image.Image)) or is_simple_tensor(inpt)):
             return inpt
 
-        for transform_id, probability, magnitude_idx in params["policy"]:
-            if not torch.rand(()) <= probability:
-                continue
-
-            magnitudes_fn, signed = self._AUGMENTATION_SPACE[transform_id]
-
-            magnitudes = magnitudes_fn(10, params["height"], params["width"])
-            if magnitudes is not None:
-                magnitude = float(magnitudes[magnitude_idx])
-                if signed and torch.rand(()) <= 0.5:
-                    magnitude *= -1
-            else:
-                magnitude = 0.0
-
-            inpt = self._apply_image_transform(
-                inpt, transform_id, magnitude, interpolation=self.interpolation, fill=self.fill
-            )
-
-        return inpt
+        policy_idx = params["policy_idx"]
+        probabilities = self._policy_probabilities[policy_idx]
+        num_ops = len(probabilities)
+        rands = self._rng.random(2 * num_ops)
+        applied = rands[:num_ops] <= probabilities
+
+        # Ops without a magnitude have a magnitude index of -1, which picks the last entry of their row of zeros.
+        transforms = self._plan_transforms(
+            self._transform_ids,
+            self._policy_transform_idcs[policy_idx][applied],
+            self._policy_magnitude_idcs[policy_idx][applied],
+            rands[num_ops:][applied] - 0.5,
+            10,
+            params["height"],
+            params["width"],
+        )
+        return self._apply_image_transforms(inpt, transforms, interpolation=self.interpolation, fill=self.fill)
 
 
 class RandAugment(_AutoAugmentBase):
@@ -309,8 +578,9 @@ class RandAugment(_AutoAugmentBase):
         num_magnitude_bins: int = 31,
         interpolation: InterpolationMode = InterpolationMode.NEAREST,
         fill: Union[int, float, Sequence[int], Sequence[float]] = 0,
+        fuse_affine: bool = False,
     ) -> None:
-        super().__init__(interpolation=interpolation, fill=fill)
+        super().__init__(interpolation=interpolation, fill=fill, fuse_affine=fuse_affine)
         self.num_ops = num_ops
         self.magnitude = magnitude
         self.num_magnitude_bins = num_magnitude_bins
@@ -319,22 +589,10 @@ class RandAugment(_AutoAugmentBase):
         if not (isinstance(inpt, (features.Image, PIL.Image.Image)) or is_simple_tensor(inpt)):
             return inpt
 
-        for _ in range(self.num_ops):
-            transform_id, (magnitudes_fn, signed) = self._get_random_item(self._AUGMENTATION_SPACE)
-
-            magnitudes = magnitudes_fn(self.num_magnitude_bins, params["height"], params["width"])
-            if magnitudes is not None:
-                magnitude = float(magnitudes[int(torch.randint(self.num_magnitude_bins, ()))])
-                if signed and torch.rand(()) <= 0.5:
-                    magnitude *= -1
-            else:
-                magnitude = 0.0
-
-            inpt = self._apply_image_transform(
-                inpt, transform_id, magnitude, interpolation=self.interpolation, fill=self.fill
-            )
-
-        return inpt
+        transforms = self._sample_transforms(
+            self._transform_ids, self.num_ops, self.num_magnitude_bins, params["height"], params["width"]
+        )
+        return self._apply_image_transforms(inpt, transforms, interpolation=self.interpolation, fill=self.fill)
 
 
 class TrivialAugmentWide(_AutoAugmentBase):
@@ -366,27 +624,19 @@ class TrivialAugmentWide(_AutoAugmentBase):
         num_magnitude_bins: int = 31,
         interpolation: InterpolationMode = InterpolationMode.NEAREST,
         fill: Union[int, float, Sequence[int], Sequence[float]] = 0,
+        fuse_affine: bool = False,
     ):
-        super().__init__(interpolation=interpolation, fill=fill)
+        super().__init__(interpolation=interpolation, fill=fill, fuse_affine=fuse_affine)
         self.num_magnitude_bins = num_magnitude_bins
 
     def _transform(self, inpt: Any, params: Dict[str, Any]) -> Any:
         if not (isinstance(inpt, (features.Image, PIL.Image.Image)) or is_simple_tensor(inpt)):
             return inpt
 
-        transform_id, (magnitudes_fn, signed) = self._get_random_item(self._AUGMENTATION_SPACE)
-
-        magnitudes = magnitudes_fn(self.num_magnitude_bins, params["height"], params["width"])
-        if magnitudes is not None:
-            magnitude = float(magnitudes[int(torch.randint(self.num_magnitude_bins, ()))])
-            if signed and torch.rand(()) <= 0.5:
-                magnitude *= -1
-        else:
-            magnitude = 0.0
-
-        return self._apply_image_transform(
-            inpt, transform_id, magnitude, interpolation=self.interpolation, fill=self.fill
+        transforms = self._sample_transforms(
+            self._transform_ids, 1, self.num_magnitude_bins, params["height"], params["width"]
         )
+        return self._apply_image_transforms(inpt, transforms, interpolation=self.interpolation, fill=self.fill)
 
 
 class AugMix(_AutoAugmentBase):
@@ -423,8 +673,9 @@ class AugMix(_AutoAugmentBase):
         all_ops: bool = True,
         interpolation: InterpolationMode = InterpolationMode.BILINEAR,
         fill: Union[int, float, Sequence[int], Sequence[float]] = 0,
+        fuse_affine: bool = False,
     ) -> None:
-        super().__init__(interpolation=interpolation, fill=fill)
+        super().__init__(interpolation=interpolation, fill=fill, fuse_affine=fuse_affine)
         self._PARAMETER_MAX = 10
         if not (1 <= severity <= self._PARAMETER_MAX):
             raise ValueError(f"The severity must be between [1, {self._PARAMETER_MAX}]. Got {severity} instead.")
@@ -433,55 +684,107 @@ class AugMix(_AutoAugmentBase):
         self.chain_depth = chain_depth
         self.alpha = alpha
         self.all_ops = all_ops
+        self._dirichlet_params: Optional[Tuple[torch.Tensor, torch.Tensor]] = None
+        self._dirichlet_params_key: Optional[Tuple[float, int, torch.device]] = None
+        self._partial_transform_ids = tuple(self._PARTIAL_AUGMENTATION_SPACE.keys())
+        self._dirichlet_generator: Optional[torch.Generator] = None
+
+    def seed(self, seed: int) -> None:
+        super().seed(seed)
+        # The generator for the Dirichlet weights has to live on the device of the images, which is only known once
+        # they come in. Thus, it is derived from the seeded numpy generator on the next call.
+        self._dirichlet_generator = None
 
     def _sample_dirichlet(self, params: torch.Tensor) -> torch.Tensor:
         # Must be on a separate method so that we can overwrite it in tests.
-        return torch._sample_dirichlet(params)
+        generator = None
+        if self._seeded:
+            if self._dirichlet_generator is None or self._dirichlet_generator.device != params.device:
+                self._dirichlet_generator = torch.Generator(device=params.device)
+                self._dirichlet_generator.manual_seed(int(self._rng.integers(2**63 - 1)))
+            generator = self._dirichlet_generator
+        return torch._sample_dirichlet(params, generator=generator)
+
+    def _get_dirichlet_params(self, device: torch.device) -> Tuple[torch.Tensor, torch.Tensor]:
+        # The parameters only depend on alpha, mixture_width, and the device of the incoming images, so we only create
+        # them again if one of these changed rather than on every call.
+        key = (self.alpha, self.mixture_width, device)
+        if self._dirichlet_params is None or self._dirichlet_params_key != key:
+            self._dirichlet_params = (
+                torch.full((1, 2), float(self.alpha), device=device),
+                torch.full((1, self.mixture_width), float(self.alpha), device=device),
+            )
+            self._dirichlet_params_key = key
+        return self._dirichlet_params
+
+    def _sample_chains(self, transform_ids: Tuple[str, ...], height: int, width: int) -> List[List[Tuple[str, float]]]:
+        # The random values for all branches are drawn at once. Only the ones within the depth of a chain are used.
+        if self.chain_depth > 0:
+            depths = [self.chain_depth] * self.mixture_width
+        else:
+            depths = self._rng.integers(1, 4, size=self.mixture_width).tolist()
+        size = (self.mixture_width, max(depths))
+        transform_idcs = self._rng.integers(len(transform_ids), size=size)
+        magnitude_idcs = self._rng.integers(self.severity, size=size)
+        signs = self._rng.random(size=size) - 0.5
+
+        return [
+            self._plan_transforms(
+                transform_ids,
+                branch_transform_idcs[:depth],
+                branch_magnitude_idcs[:depth],
+                branch_signs[:depth],
+                self._PARAMETER_MAX,
+                height,
+                width,
+            )
+            for depth, branch_transform_idcs, branch_magnitude_idcs, branch_signs in zip(
+                depths, transform_idcs, magnitude_idcs, signs
+            )
+        ]
 
     def _transform(self, inpt: Any, params: Dict[str, Any]) -> Any:
         if isinstance(inpt, features.Image) or is_simple_tensor(inpt):
             image = inpt
         elif isinstance(inpt, PIL.Image.Image):
+            warnings.warn(
+                "AugMix operates on tensors and thus converts PIL images to tensors and back on every call. "
+                "Consider converting the images upfront, e.g. with ToImageTensor(), to avoid the extra copies.",
+                stacklevel=_get_caller_stacklevel(),
+            )
             image = pil_to_tensor(inpt)
         else:
             return inpt
 
-        augmentation_space = self._AUGMENTATION_SPACE if self.all_ops else self._PARTIAL_AUGMENTATION_SPACE
+        transform_ids = self._transform_ids if self.all_ops else self._partial_transform_ids
 
         orig_dims = list(image.shape)
         batch = image.view([1] * max(4 - image.ndim, 0) + orig_dims)
         batch_dims = [batch.size(0)] + [1] * (batch.ndim - 1)
 
+        beta_params, mix_params = self._get_dirichlet_params(batch.device)
+
         # Sample the beta weights for combining the original and augmented image. To get Beta, we use a Dirichlet
         # with 2 parameters. The 1st column stores the weights of the original and the 2nd the ones of augmented image.
-        m = self._sample_dirichlet(
-            torch.tensor([self.alpha, self.alpha], device=batch.device).expand(batch_dims[0], -1)
-        )
+        m = self._sample_dirichlet(beta_params.expand(batch_dims[0], -1))
 
         # Sample the mixing weights and combine them with the ones sampled from Beta for the augmented images.
-        combined_weights = self._sample_dirichlet(
-            torch.tensor([self.alpha] * self.mixture_width, device=batch.device).expand(batch_dims[0], -1)
-        ) * m[:, 1].view([batch_dims[0], -1])
+        combined_weights = self._sample_dirichlet(mix_params.expand(batch_dims[0], -1))
+        combined_weights *= m[:, 1].view([batch_dims[0], -1])
+
+        chains = self._sample_chains(transform_ids, params["height"], params["width"])
 
+        # The chains are applied one by one on the device of the input, so they give the same result on every device.
+        # The weighted images are accumulated in place, so no temporary weighted copy of each branch is created.
+        # Reading the weight of a single image back with .item() would synchronize with an accelerator and is thus
+        # only done on the CPU.
         mix = m[:, 0].view(batch_dims) * batch
-        for i in range(self.mixture_width):
-            aug = batch
-            depth = self.chain_depth if self.chain_depth > 0 else int(torch.randint(low=1, high=4, size=(1,)).item())
-            for _ in range(depth):
-                transform_id, (magnitudes_fn, signed) = self._get_random_item(augmentation_space)
-
-                magnitudes = magnitudes_fn(self._PARAMETER_MAX, params["height"], params["width"])
-                if magnitudes is not None:
-                    magnitude = float(magnitudes[int(torch.randint(self.severity, ()))])
-                    if signed and torch.rand(()) <= 0.5:
-                        magnitude *= -1
-                else:
-                    magnitude = 0.0
-
-                aug = self._apply_image_transform(
-                    aug, transform_id, magnitude, interpolation=self.interpolation, fill=self.fill
-                )
-            mix.add_(combined_weights[:, i].view(batch_dims) * aug)
+        for i, transforms in enumerate(chains):
+            aug = self._apply_image_transforms(batch, transforms, interpolation=self.interpolation, fill=self.fill)
+            if batch_dims[0] == 1 and batch.device.type == "cpu":
+                mix.add_(aug, alpha=combined_weights[0, i].item())
+            else:
+                mix.addcmul_(combined_weights[:, i].view(batch_dims), aug)
         mix = mix.view(orig_dims).to(dtype=image.dtype)
 
         if isinstance(inpt, features.Image):
@@ -1,5 +1,6 @@
-from typing import Union
+from typing import Optional, Union
 
+import numpy as np
 import PIL.Image
 import torch
 from torchvision.prototype import features
@@ -9,7 +10,24 @@ from torchvision.transforms import functional_pil as _FP, functional_tensor as _
 # shortcut type
 DType = Union[torch.Tensor, PIL.Image.Image, features._Feature]
 
-adjust_brightness_image_tensor = _FT.adjust_brightness
+
+def _blend(image: torch.Tensor, ratio: float, other: Optional[torch.Tensor]) -> torch.Tensor:
+    # Same as _FT._blend, but all steps after the first one are applied in place on the single intermediate buffer.
+    # Blending with zeros, i.e. other=None, leaves the scaled image untouched and is thus skipped entirely.
+    bound = 1.0 if image.is_floating_point() else 255.0
+    output = image.mul(ratio)
+    if other is not None:
+        output.add_((1.0 - ratio) * other)
+    return output.clamp_(0, bound).to(image.dtype)
+
+
+def adjust_brightness_image_tensor(img: torch.Tensor, brightness_factor: float) -> torch.Tensor:
+    if brightness_factor >= 0 and img.ndim >= 3 and img.shape[-3] in [1, 3]:
+        return _blend(img, brightness_factor, None)
+
+    return _FT.adjust_brightness(img, brightness_factor=brightness_factor)
+
+
 adjust_brightness_image_pil = _FP.adjust_brightness
 
 
@@ -22,7 +40,13 @@ def adjust_brightness(inpt: DType, brightness_factor: float) -> DType:
         return adjust_brightness_image_tensor(inpt, brightness_factor=brightness_factor)
 
 
-adjust_saturation_image_tensor = _FT.adjust_saturation
+def adjust_saturation_image_tensor(img: torch.Tensor, saturation_factor: float) -> torch.Tensor:
+    if saturation_factor >= 0 and img.ndim >= 3 and img.shape[-3] == 3:
+        return _blend(img, saturation_factor, _FT.rgb_to_grayscale(img))
+
+    return _FT.adjust_saturation(img, saturation_factor=saturation_factor)
+
+
 adjust_saturation_image_pil = _FP.adjust_saturation
 
 
@@ -35,7 +59,16 @@ def adjust_saturation(inpt: DType, saturation_factor: float) -> DType:
         return adjust_saturation_image_tensor(inpt, saturation_factor=saturation_factor)
 
 
-adjust_contrast_image_tensor = _FT.adjust_contrast
+def adjust_contrast_image_tensor(img: torch.Tensor, contrast_factor: float) -> torch.Tensor:
+    if contrast_factor >= 0 and img.ndim >= 3 and img.shape[-3] in [1, 3]:
+        dtype = img.dtype if img.is_floating_point() else torch.float32
+        grayscale = _FT.rgb_to_grayscale(img) if img.shape[-3] == 3 else img
+        mean = torch.mean(grayscale.to(dtype), dim=(-3, -2, -1), keepdim=True)
+        return _blend(img, contrast_factor, mean)
+
+    return _FT.adjust_contrast(img, contrast_factor=contrast_factor)
+
+
 adjust_contrast_image_pil = _FP.adjust_contrast
 
 
@@ -113,7 +146,26 @@ def solarize(inpt: DType, threshold: float) -> DType:
         return solarize_image_tensor(inpt, threshold=threshold)
 
 
-autocontrast_image_tensor = _FT.autocontrast
+def autocontrast_image_tensor(image: torch.Tensor) -> torch.Tensor:
+    if not (image.ndim >= 3 and image.shape[-3] in [1, 3]):
+        return _FT.autocontrast(image)
+
+    # Same as _FT.autocontrast, but the minimum and maximum of each channel are found in a single reduction and the
+    # rescaling is applied in place on the one intermediate buffer.
+    bound = 1.0 if image.is_floating_point() else 255.0
+    dtype = image.dtype if image.is_floating_point() else torch.float32
+
+    minimum, maximum = torch.aminmax(image.flatten(-2), dim=-1, keepdim=True)
+    minimum = minimum.unsqueeze(-1).to(dtype)
+    maximum = maximum.unsqueeze(-1).to(dtype)
+    scale = bound / (maximum - minimum)
+    eq_idxs = torch.isfinite(scale).logical_not()
+    minimum.masked_fill_(eq_idxs, 0)
+    scale.masked_fill_(eq_idxs, 1)
+
+    return (image - minimum).mul_(scale).clamp_(0, bound).to(image.dtype)
+
+
 autocontrast_image_pil = _FP.autocontrast
 
 
@@ -126,7 +178,39 @@ def autocontrast(inpt: DType) -> DType:
         return autocontrast_image_tensor(inpt)
 
 
-equalize_image_tensor = _FT.equalize
+@torch.jit.unused
+def _equalize_image_tensor_cpu(image: torch.Tensor) -> torch.Tensor:
+    # Instead of running a chain of small torch ops for every channel, we compute the histograms and lookup tables of
+    # all channels at once with numpy. The lookup tables are the same as the ones of _FT.equalize.
+    shape = image.shape
+    channels = image.reshape(-1, shape[-2] * shape[-1]).numpy()
+
+    hist = np.stack([np.bincount(channel, minlength=256) for channel in channels])
+    last_nonzero = hist.shape[1] - 1 - np.argmax(hist[:, ::-1] != 0, axis=1)
+    step = (hist.sum(axis=1) - hist[np.arange(hist.shape[0]), last_nonzero]) // 255
+    step = step[:, None]
+
+    lut = (hist.cumsum(axis=1) + step // 2) // np.maximum(step, 1)
+    lut = np.concatenate([np.zeros_like(lut[:, :1]), lut[:, :-1]], axis=1).clip(0, 255)
+    lut = np.where(step == 0, np.arange(256), lut).astype(np.uint8)
+
+    return torch.from_numpy(np.take_along_axis(lut, channels, axis=1)).reshape(shape)
+
+
+def equalize_image_tensor(image: torch.Tensor) -> torch.Tensor:
+    if (
+        not torch.jit.is_scripting()
+        and not torch.jit.is_tracing()
+        and image.dtype == torch.uint8
+        and image.device.type == "cpu"
+        and image.ndim in [3, 4]
+        and image.shape[-3] in [1, 3]
+    ):
+        return _equalize_image_tensor_cpu(image)
+
+    return _FT.equalize(image)
+
+
 equalize_image_pil = _FP.equalize
 
 